@@ -8,13 +8,11 @@ Includes the ability to filter by a specific video category.
 """
 \
 import os
+import json
 import time
 import argparse
-import requests
 from datetime import datetime, timedelta, timezone
-
-API_KEY = os.getenv("YOUTUBE_API_KEY")
-BASE_URL = "https://www.googleapis.com/youtube/v3"
+from youtube_api import API_KEY, BASE_URL, get_json
 
 # Default keywords if no query is provided via command line
 AI_KEYWORDS = [
@@ -26,26 +24,22 @@ AI_KEYWORDS = [
 def to_iso8601_day_start(dstr):
     return f"{dstr}T00:00:00Z"
 
-def _get(url, params, max_retries=5, backoff=1.6):
-    params = dict(params or {}); params["key"] = API_KEY
-    for attempt in range(max_retries):
-        try:
-            r = requests.get(url, params=params, timeout=30)
-            if r.status_code == 200: return r.json()
-            if r.status_code in (403, 429, 500, 503):
-                print(f"Warning: Received status code {r.status_code}. Retrying in {int(backoff ** attempt) + 1}s...")
-                time.sleep(int(backoff ** attempt) + 1)
-                continue
-            r.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred: {e}. Retrying...")
-            time.sleep(int(backoff ** attempt) + 1)
-    raise RuntimeError(f"Failed after {max_retries} retries.")
+def _load_state(path):
+    try:
+        with open(path, 'r') as f: return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f: json.dump(state, f)
+    os.replace(tmp, path)
 
 def search_and_save_ids(args):
     url = f"{BASE_URL}/search"
     params = {
         "part": "id",
+        "fields": "nextPageToken,items/id/videoId",
         "q": args.query,
         "type": "video",
         "maxResults": 50,
@@ -61,37 +55,81 @@ def search_and_save_ids(args):
     if args.region: params["regionCode"] = args.region
     if args.category_id: params["videoCategoryId"] = args.category_id
 
-    found_ids = set()
-    next_token = None
+    # Pagination state is saved next to the output so --resume can continue from the last page
+    # instead of paying 100 units again for every page already saved. Page tokens belong to the
+    # original request, so a matching resume reuses its params (including publishedAfter).
+    state_file = f"{args.output_file}.state.json"
+    query_key = {**params, "publishedAfter": args.start_date or f"{args.days}d"}
+    page_token, exhausted, continued = None, False, False
+
+    # Insertion-ordered dict: O(1) dedup that also keeps IDs in the order search returned them
+    found_ids: dict[str, None] = {}
+    if args.resume and os.path.exists(args.output_file):
+        with open(args.output_file, 'r') as f:
+            found_ids = dict.fromkeys(line.strip() for line in f if line.strip())
+        print(f"[*] Resuming with {len(found_ids)} video IDs already in {args.output_file}.")
+        state = _load_state(state_file)
+        # The state must describe exactly the file on disk, or its page token would skip unsaved pages
+        if state and state.get("query") == query_key and state.get("saved") == len(found_ids):
+            params, page_token, exhausted, continued = state["params"], state["pageToken"], state["exhausted"], True
+            print("[*] Search results already exhausted for this query." if exhausted
+                  else "[*] Continuing from the last saved search page.")
+        else:
+            print("[*] No saved search page matching this query and file; restarting at page 1 "
+                  "(pages of already-saved IDs cost quota again).")
     
-    pages = (args.max_results + 49) // 50
+    if exhausted:
+        pages = 0
+    elif continued:
+        pages = (max(args.max_results - len(found_ids), 0) + 49) // 50
+    else:
+        pages = (args.max_results + 49) // 50
     estimated_cost = pages * 100
     print(f"[*] Estimated quota cost for search: {pages} pages * 100 units = {estimated_cost} units.")
 
-    while len(found_ids) < args.max_results:
-        if next_token:
-            params["pageToken"] = next_token
-        
-        data = _get(url, params)
-        
-        for item in data.get("items", []):
-            video_id = item.get("id", {}).get("videoId")
-            if video_id:
-                found_ids.add(video_id)
-        
-        print(f"  > Found {len(found_ids)} unique video IDs so far...")
-        
-        next_token = data.get("nextPageToken")
-        if not next_token:
-            print("[*] Reached the end of search results.")
-            break
-        time.sleep(0.1)
+    if not args.resume:
+        # A fresh run empties the output, so an older state must not outlive it
+        try: os.remove(state_file)
+        except FileNotFoundError: pass
 
-    with open(args.output_file, 'w') as f:
-        for vid in list(found_ids)[:args.max_results]:
-            f.write(f"{vid}\n")
+    # Each page's new IDs are written in one call and flushed, so a crash or
+    # quota error mid-run still leaves every ID collected so far on disk.
+    with open(args.output_file, 'a' if args.resume else 'w', buffering=1 << 16) as f:
+        while not exhausted and len(found_ids) < args.max_results:
+            if page_token:
+                params["pageToken"] = page_token
+            
+            data = get_json(url, params)
+            
+            new_ids = []; page_done = True
+            for item in data.get("items", []):
+                video_id = item.get("id", {}).get("videoId")
+                if video_id and video_id not in found_ids:
+                    found_ids[video_id] = None
+                    new_ids.append(video_id)
+                    if len(found_ids) >= args.max_results:
+                        page_done = False
+                        break
+            if new_ids:
+                f.write("\n".join(new_ids) + "\n")
+                f.flush()
+            
+            # Stopped mid-page: a later resume re-reads this page for its remaining IDs
+            next_token = data.get("nextPageToken")
+            if page_done:
+                page_token, exhausted = next_token, not next_token
+            _save_state(state_file, {
+                "query": query_key, "pageToken": page_token, "exhausted": exhausted, "saved": len(found_ids),
+                "params": {k: v for k, v in params.items() if k != "pageToken"},
+            })
+            
+            print(f"  > Found {len(found_ids)} unique video IDs so far...")
+            if exhausted:
+                print("[*] Reached the end of search results.")
+            elif len(found_ids) < args.max_results:
+                time.sleep(0.1)
     
-    print(f"\n[*] Success! Saved {len(list(found_ids)[:args.max_results])} video IDs to {args.output_file}")
+    print(f"\n[*] Success! Saved {len(found_ids)} video IDs to {args.output_file}")
 
 def main():
     ap = argparse.ArgumentParser()
@@ -104,6 +142,7 @@ def main():
     ap.add_argument("--region", type=str, default=None, help="e.g., US, ID")
     ap.add_argument("--category_id", type=str, default=None, help="Filter search by YouTube video category ID.")
     ap.add_argument("--output_file", type=str, default="out/video_ids.txt")
+    ap.add_argument("--resume", action="store_true", help="Append to an existing output file, skipping IDs already saved and continuing from the last saved search page.")
     args = ap.parse_args()
 
     if not API_KEY:
@@ -8,16 +8,32 @@ Uses bilingual keywords for matching but outputs standardized English tags for a
 
 import os
 import re
-import argparse
-import requests
 import time
+import zlib
+import sqlite3
+import argparse
+import asyncio
 try:
+    import numpy as np
     import pandas as pd
 except Exception as e:
     raise SystemExit("Please install pandas: pip install -U pandas") from e
+try:
+    import aiohttp
+except Exception as e:
+    raise SystemExit("Please install aiohttp: pip install -U aiohttp") from e
+try:
+    import orjson
+except Exception as e:
+    raise SystemExit("Please install orjson: pip install -U orjson") from e
+from youtube_api import API_KEY, BASE_URL, RETRY_STATUSES, retry_delay, chunked, to_int
 
-API_KEY = os.getenv("YOUTUBE_API_KEY")
-BASE_URL = "https://www.googleapis.com/youtube/v3"
+VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+# Partial response: only the fields get_video_details_async reads are sent over the wire (and cached)
+VIDEO_FIELDS = (
+    "items(id,snippet(publishedAt,channelId,channelTitle,title,description,tags,categoryId),"
+    "statistics(viewCount,likeCount,commentCount),contentDetails/duration)"
+)
 
 AI_KEYWORDS = [
     "ai generated", "ai video", "text-to-video", "sora", "runway gen-3", "runwayml",
@@ -32,99 +48,224 @@ EDUKASI_TERMS = ['tutorial', 'how to', 'guide', 'masterclass', 'lesson', 'course
 ULASAN_TERMS = ['review', 'news', 'update', 'demo', 'vs', 'versus', 'hands-on', 'first look', 'analysis', 'report', 'reaction', 'ulasan', 'berita']
 EKSPERIMEN_TERMS = ['experiment', 'test', 'challenge', 'prompt', 'showcase', 'uji coba']
 
+def _trie_pattern(terms):
+    """Builds a prefix-factored alternation so the regex engine never re-reads a shared prefix."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term.lower(): node = node.setdefault(ch, {})
+        node[None] = True
+    def _node(node):
+        # A complete term is enough for a match, so longer terms sharing it as a prefix are dropped
+        if None in node: return ''
+        alts = [re.escape(ch) + _node(child) for ch, child in sorted(node.items())]
+        return alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+    return _node(trie)
+
+# One alternation per output tag (sorted, so joined tags keep alphabetical order); the text is
+# lowercased once before matching, exactly like the original str.lower() + `in` check.
+# Kept as plain strings: pandas 2.x hands Arrow-backed columns' patterns straight to pyarrow,
+# which rejects compiled re.Pattern objects (the re module caches the compiled form anyway).
+CATEGORY_TERMS = {
+    'creative_work': KREATIF_TERMS, 'education_tutorial': EDUKASI_TERMS,
+    'review_news': ULASAN_TERMS, 'experiment': EKSPERIMEN_TERMS,
+}
+CATEGORY_PATTERNS = {
+    category: _trie_pattern(terms)
+    for category, terms in sorted(CATEGORY_TERMS.items())
+}
+AI_PATTERN = _trie_pattern(AI_KEYWORDS)
+
+
+# Max number of videos.list batches in flight at once, and max requests started per second
+MAX_CONCURRENCY = 16
+MAX_REQUESTS_PER_SECOND = 10
+
+
+# --- Helper functions ---
+class RateLimiter:
+    """Token bucket shared by all fetch coroutines (replaces the old fixed sleep between batches)."""
+    def __init__(self, rate):
+        # Burst capacity of at least one token so rates below 1/s still make progress
+        self.rate = rate; self.capacity = max(rate, 1); self.tokens = self.capacity; self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
 
-# --- Helper functions (no changes) ---
-def _get(url, params, max_retries=5, backoff=1.6):
+    async def wait(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate); self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1; return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def _get_async(session, url, params, sem, limiter, max_retries=5, backoff=1.6):
     params = dict(params or {}); params["key"] = API_KEY
-    for attempt in range(max_retries):
-        try:
-            r = requests.get(url, params=params, timeout=30)
-            if r.status_code == 200: return r.json()
-            if r.status_code in (403, 429, 500, 503):
-                time.sleep(int(backoff ** attempt) + 1); continue
-            r.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred: {e}. Retrying...")
-            time.sleep(int(backoff ** attempt) + 1)
+    async with sem:
+        for attempt in range(max_retries):
+            try:
+                await limiter.wait()
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as r:
+                    if r.status == 200: return orjson.loads(await r.read())
+                    if r.status in RETRY_STATUSES:
+                        await asyncio.sleep(retry_delay(r, attempt, backoff)); continue
+                    r.raise_for_status()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"An error occurred: {e}. Retrying...")
+                await asyncio.sleep(int(backoff ** attempt) + 1)
     raise RuntimeError(f"Failed after {max_retries} retries.")
 
-def chunked(iterable, n):
-    buf = [];
-    for x in iterable:
-        buf.append(x)
-        if len(buf) == n: yield buf; buf = []
-    if buf: yield buf
-
-def to_int(x, default=0):
-    try: return int(x)
-    except: return default
-
-def get_video_details(video_ids):
-    rows = []; url = f"{BASE_URL}/videos"
-    for i, batch in enumerate(chunked(video_ids, 50)):
-        print(f"  > Fetching details for batch {i+1}...")
-        params = {"part": "snippet,statistics,contentDetails", "id": ",".join(batch)}
-        data = _get(url, params)
-        for it in data.get("items", []):
+# --- videos.list response cache (one compressed JSON item per video ID; NULL payload = not returned) ---
+def open_cache(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS videos_cache (video_id TEXT PRIMARY KEY, fetched_at INTEGER, payload BLOB)")
+    return conn
+
+def cache_lookup(conn, video_ids, ttl_days):
+    hits = {}; fresh_after = int(time.time()) - ttl_days * 86400
+    # Stay well under SQLite's bound-parameter limit
+    for batch in chunked(video_ids, 500):
+        placeholders = ",".join("?" * len(batch))
+        for vid, payload in conn.execute(
+            f"SELECT video_id, payload FROM videos_cache WHERE video_id IN ({placeholders}) AND fetched_at > ?",
+            (*batch, fresh_after),
+        ):
+            hits[vid] = orjson.loads(zlib.decompress(payload)) if payload is not None else None
+    return hits
+
+def cache_store(conn, items, missing_ids=()):
+    # Deleted/private videos are not returned by videos.list; remember them so they aren't re-requested
+    now = int(time.time())
+    conn.executemany(
+        "INSERT OR REPLACE INTO videos_cache (video_id, fetched_at, payload) VALUES (?, ?, ?)",
+        [(it.get("id"), now, zlib.compress(orjson.dumps(it))) for it in items if it.get("id")]
+        + [(vid, now, None) for vid in missing_ids],
+    )
+    conn.commit()
+
+async def get_video_details_async(video_ids, cache=None, cache_ttl_days=30, qps=MAX_REQUESTS_PER_SECOND):
+    url = f"{BASE_URL}/videos"
+    cached = cache_lookup(cache, video_ids, cache_ttl_days) if cache is not None else {}
+    misses = [vid for vid in video_ids if vid not in cached]
+    batches = list(chunked(misses, 50))
+    unavailable = sum(1 for it in cached.values() if it is None)
+    print(f"  > {len(cached)} videos served from cache ({unavailable} known unavailable); "
+          f"fetching {len(misses)} in {len(batches)} batches (up to {MAX_CONCURRENCY} at a time, {qps:g} per second)...")
+    fetched = {}
+    if batches:
+        sem = asyncio.Semaphore(MAX_CONCURRENCY); limiter = RateLimiter(qps)
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY, limit_per_host=MAX_CONCURRENCY)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def fetch_batch(batch):
+                params = {"part": "snippet,statistics,contentDetails", "fields": VIDEO_FIELDS, "id": ",".join(batch)}
+                items = (await _get_async(session, url, params, sem, limiter)).get("items", [])
+                fetched.update((it.get("id"), it) for it in items)
+                # Cache each batch as soon as it lands so a later failure (e.g. quotaExceeded) keeps it
+                if cache is not None:
+                    returned = {it.get("id") for it in items}
+                    cache_store(cache, items, [vid for vid in batch if vid not in returned])
+            results = await asyncio.gather(*[fetch_batch(batch) for batch in batches], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            print(f"[!] {len(errors)} of {len(batches)} batches failed; the other {len(batches) - len(errors)} were cached.")
+            raise errors[0]
+    # Accumulate one list per column so pandas can allocate each column directly
+    ids, published, channel_ids, channel_titles, titles, descriptions = [], [], [], [], [], []
+    tags_col, category_ids, durations, views, likes, comments = [], [], [], [], [], []
+    for vid in dict.fromkeys(video_ids):
+        it = cached.get(vid) or fetched.get(vid)
+        if it:
             sn = it.get("snippet", {}) or {}; st = it.get("statistics", {}) or {}; cd = it.get("contentDetails", {}) or {}
             tags = sn.get("tags") or []
-            rows.append({
-                "videoId": it.get("id"), "publishedAt": sn.get("publishedAt"),
-                "channelId": sn.get("channelId"), "channelTitle": sn.get("channelTitle"),
-                "title": sn.get("title"), "description": sn.get("description"),
-                "tags": "|".join(tags) if tags else "", "categoryId": sn.get("categoryId"),
-                "duration": cd.get("duration"), "viewCount": to_int(st.get("viewCount")),
-                "likeCount": to_int(st.get("likeCount")), "commentCount": to_int(st.get("commentCount")),
-                "url": f"https://www.youtube.com/watch?v={it.get('id')}"
-            })
-        time.sleep(0.1)
-    return rows
+            ids.append(it.get("id")); published.append(sn.get("publishedAt"))
+            channel_ids.append(sn.get("channelId")); channel_titles.append(sn.get("channelTitle"))
+            titles.append(sn.get("title")); descriptions.append(sn.get("description"))
+            tags_col.append("|".join(tags) if tags else ""); category_ids.append(sn.get("categoryId"))
+            durations.append(cd.get("duration")); views.append(to_int(st.get("viewCount")))
+            likes.append(to_int(st.get("likeCount"))); comments.append(to_int(st.get("commentCount")))
+    return pd.DataFrame({
+        "videoId": ids, "publishedAt": published,
+        "channelId": channel_ids, "channelTitle": channel_titles,
+        "title": titles, "description": descriptions,
+        "tags": tags_col, "categoryId": category_ids,
+        "duration": durations, "viewCount": np.asarray(views, dtype="int64"),
+        "likeCount": np.asarray(likes, dtype="int64"), "commentCount": np.asarray(comments, dtype="int64"),
+        "url": [f"https://www.youtube.com/watch?v={vid}" for vid in ids],
+    })
 
 # ========== CLASSIFICATION FUNCTION UPDATED TO RETURN ENGLISH LABELS ==========
-def klasifikasi_konten_dengan_tag(row) -> str:
-    tags = []
-    text_corpus = " ".join([
-        str(row.get("title") or ""),
-        str(row.get("description") or "")
-    ]).lower()
-
-    if any(term in text_corpus for term in KREATIF_TERMS):
-        tags.append('creative_work')
-    if any(term in text_corpus for term in EDUKASI_TERMS):
-        tags.append('education_tutorial')
-    if any(term in text_corpus for term in ULASAN_TERMS):
-        tags.append('review_news')
-    if any(term in text_corpus for term in EKSPERIMEN_TERMS):
-        tags.append('experiment')
-
-    is_ai_keyword_present = any(keyword in text_corpus for keyword in AI_KEYWORDS)
-    if not tags and is_ai_keyword_present:
-        tags.append('general_ai_content')
-        
-    if not tags:
-        return 'Irrelevant'
-    
-    return "|".join(sorted(tags))
+def klasifikasi_dataframe(df) -> pd.Series:
+    """Tags every row at once with vectorized string ops instead of a per-row apply."""
+    corpus = df["title"].fillna("") + " " + df["description"].fillna("")
+    # Arrow's lowercasing maps 'İ' to a plain 'i' but Python's str.lower gives 'i̇'; pin Python's result
+    corpus = corpus.str.replace("\u0130", "i\u0307", regex=False).str.lower()
+
+    # Join the per-tag masks column by column; no Python callback runs per row
+    content_tags = pd.Series("", index=df.index, dtype=object)
+    for category, pattern in CATEGORY_PATTERNS.items():
+        content_tags += np.where(corpus.str.contains(pattern, regex=True), f"{category}|", "")
+    content_tags = content_tags.str.rstrip('|')
+
+    # AI keywords only decide the fallback label, so only rows left untagged are scanned for them
+    untagged = content_tags == ''
+    is_ai_keyword_present = corpus[untagged].str.contains(AI_PATTERN, regex=True)
+    content_tags.loc[untagged] = np.where(is_ai_keyword_present, 'general_ai_content', 'Irrelevant')
+    return content_tags
 # ========== END OF UPDATE ==========
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input_file", type=str, default="out/video_ids.txt", help="File containing video IDs.")
-    ap.add_argument("--output_file", type=str, default="out/videos_ai_deskriptif.csv", help="Single output file for descriptive analysis.")
+    ap.add_argument("--output_file", type=str, default=None, help="Single output file for descriptive analysis (default: out/videos_ai_deskriptif.<format>).")
+    ap.add_argument("--format", type=str, choices=("csv", "parquet"), default="csv", help="Output format; parquet needs pyarrow.")
+    ap.add_argument("--cache_file", type=str, default="out/videos_cache.sqlite", help="SQLite cache of videos.list responses ('' to disable).")
+    ap.add_argument("--cache_ttl_days", type=int, default=30, help="Re-fetch cached videos older than this many days.")
+    ap.add_argument("--qps", type=float, default=MAX_REQUESTS_PER_SECOND, help="Max videos.list requests started per second.")
     args = ap.parse_args()
+    if not args.qps > 0:
+        ap.error("--qps must be greater than 0")
+
+    if not API_KEY:
+        raise SystemExit("Please set env var YOUTUBE_API_KEY")
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except Exception as e:
+            raise SystemExit("Please install pyarrow for --format parquet: pip install -U pyarrow") from e
+    if args.output_file is None:
+        args.output_file = f"out/videos_ai_deskriptif.{args.format}"
     if not os.path.exists(args.input_file):
         raise SystemExit(f"Error: Input file not found at {args.input_file}.")
     with open(args.input_file, 'r') as f:
-        video_ids = [line.strip() for line in f if line.strip()]
-    print(f"[*] Found {len(video_ids)} video IDs in {args.input_file}.")
-    details = get_video_details(video_ids)
-    if not details:
+        lines = [line.strip() for line in f if line.strip()]
+    # Every duplicate or malformed ID would otherwise cost part of an API call
+    video_ids = [vid for vid in dict.fromkeys(lines) if VIDEO_ID_RE.fullmatch(vid)]
+    print(f"[*] Found {len(video_ids)} unique video IDs in {args.input_file} "
+          f"({len(lines) - len(video_ids)} of {len(lines)} lines skipped as duplicates or malformed).")
+    cache = open_cache(args.cache_file) if args.cache_file else None
+    try:
+        df = asyncio.run(get_video_details_async(video_ids, cache, args.cache_ttl_days, args.qps))
+    finally:
+        if cache is not None: cache.close()
+    if df.empty:
         print("No details were fetched. Exiting.")
         return
-    df = pd.DataFrame(details)
+    # Arrow-backed strings: contiguous buffers instead of Python objects, and .str ops run in Arrow kernels
+    text_cols = ["title", "description", "channelTitle", "tags", "categoryId"]
+    try:
+        df[text_cols] = df[text_cols].astype("string[pyarrow]")
+    except ImportError:
+        pass  # pyarrow not installed; keep object columns
     print("[*] Classifying videos with bilingual keywords and English tags...")
-    df["content_tags"] = df.apply(klasifikasi_konten_dengan_tag, axis=1) # Using a new column name
-    df.to_csv(args.output_file, index=False, encoding='utf-8-sig')
+    df["content_tags"] = klasifikasi_dataframe(df) # Using a new column name
+    if args.format == "parquet":
+        # Low-cardinality ID columns compress far better as dictionary-encoded categories
+        df["channelId"] = df["channelId"].astype("category")
+        df["categoryId"] = df["categoryId"].astype("category")
+        df.to_parquet(args.output_file, index=False, engine="pyarrow", compression="zstd")
+    else:
+        df.to_csv(args.output_file, index=False, encoding='utf-8-sig')
     print(f"\n[*] Success! Saved {len(df)} classified videos to {args.output_file}")
     print("\nDistribution of content tags (Top 10):")
     # Explode tags for accurate value counting
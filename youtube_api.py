@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Shared YouTube Data API v3 helpers for 1_search_ids.py and 2_fetch_details.py.
+
+Keeps the API key, the keep-alive session with its retry policy, and JSON parsing in one place.
+"""
+
+import os
+import time
+import orjson
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_KEY = os.getenv("YOUTUBE_API_KEY")
+BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+# Status codes worth retrying (403 covers quota/rate-limit errors)
+RETRY_STATUSES = (403, 429, 500, 503)
+
+# One keep-alive session for every request; urllib3 handles retries and backoff
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1, pool_maxsize=10,
+    max_retries=Retry(
+        total=5, backoff_factor=1.6, status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True, allowed_methods=frozenset(["GET"]),
+    ),
+))
+
+def get_json(url, params):
+    params = dict(params or {}); params["key"] = API_KEY
+    r = SESSION.get(url, params=params, timeout=30)
+    r.raise_for_status()
+    return orjson.loads(r.content)
+
+def retry_delay(r, attempt, backoff):
+    """Seconds to wait before retrying: the server's Retry-After if given, else exponential backoff."""
+    retry_after = r.headers.get("Retry-After")
+    if retry_after:
+        try: return max(float(retry_after), 0)
+        except ValueError: pass
+        try: return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        except (TypeError, ValueError): pass
+    return int(backoff ** attempt) + 1
+
+def chunked(iterable, n):
+    buf = [];
+    for x in iterable:
+        buf.append(x)
+        if len(buf) == n: yield buf; buf = []
+    if buf: yield buf
+
+def to_int(x, default=0):
+    try: return int(x)
+    except: return default